@@ -5,8 +5,8 @@
 
 import random
 import sys
+from functools import partial
 from ucb import main, interact, trace
-from collections import OrderedDict
 
 
 ################
@@ -28,6 +28,9 @@ class Place:
         self.bees = []        # A list of Bees
         self.ant = None       # An Ant
         self.entrance = None  # A Place
+        self._ancestors = None  # Set by AntColony.configure
+        self._tunnel_places = None  # Set by AntColony.configure
+        self._blocker = None  # self.ant if it blocks the path of Bees
         # Phase 1: Add an entrance to the exit
 
         if self.exit:
@@ -58,6 +61,7 @@ class Place:
             else:
                 # Neither ant can contain the other
                 assert self.ant is None, 'Two ants in {0}'.format(self)
+            self._update_blocker()
         else:
             self.bees.append(insect)
         insect.place = self
@@ -65,7 +69,12 @@ class Place:
     def remove_insect(self, insect):
         """Remove an Insect from this Place."""
         if not insect.is_ant():
-            self.bees.remove(insect)
+            # The order of bees in a Place does not matter, so fill the gap
+            # with the last bee rather than shifting the rest of the list
+            i = self.bees.index(insect)
+            last = self.bees.pop()
+            if i != len(self.bees):
+                self.bees[i] = last
         else:
             assert self.ant == insect, '{0} is not in {1}'.format(insect, self)
 
@@ -76,9 +85,45 @@ class Place:
                 self.ant = insect.ant
             else:
                 self.ant = None
+            self._update_blocker()
 
         insect.place = None
 
+    def reduce_bees_armor(self, amount):
+        """Reduce the armor of every Bee in this Place by amount."""
+        for bee in list(self.bees):
+            bee.reduce_armor(amount)
+
+    def _update_blocker(self):
+        """Record which Ant, if any, Bees in this Place must sting."""
+        if self.ant is not None and self.ant.blocks_path:
+            self._blocker = self.ant
+        else:
+            self._blocker = None
+
+    def entrances_to(self, hive):
+        """Return a list of this Place followed by each Place reached by
+        following entrances, stopping before HIVE (or at the end of the
+        tunnel)."""
+        places = []
+        place = self
+        while place is not None and place is not hive:
+            places.append(place)
+            place = place.entrance
+        return places
+
+    def tunnel(self, hive):
+        """Return a list of every Place in this Place's tunnel, starting at
+        the Place that Bees enter from HIVE and following exits to the end."""
+        place = self
+        while place.entrance is not None and place.entrance is not hive:
+            place = place.entrance
+        places = []
+        while place is not None:
+            places.append(place)
+            place = place.exit
+        return places
+
     def __str__(self):
         return self.name
 
@@ -140,7 +185,7 @@ class Bee(Insect):
         """Return True if this Bee cannot advance to the next Place."""
         # Phase 2: Special handling for NinjaAnt
 
-        return self.place.ant is not None and self.place.ant.blocks_path
+        return self.place._blocker is not None
 
     def action(self, colony):
         """A Bee's action stings the Ant that blocks its exit if it is blocked,
@@ -149,7 +194,7 @@ class Bee(Insect):
         colony -- The AntColony, used to access game state information.
         """
         if self.blocked():
-            self.sting(self.place.ant)
+            self.sting(self.place._blocker)
         else:
             if self.place.name != 'Hive' and self.armor > 0:
                 self.move_to(self.place.exit)
@@ -190,9 +235,9 @@ class HarvesterAnt(Ant):
         """
         colony.food += 1
 
-def random_or_none(l):
+def random_or_none(l, _choice=random.choice):
     """Return a random element of list l, or return None if l is empty."""
-    return random.choice(l) if l else None
+    return _choice(l) if l else None
 
 
 class ThrowerAnt(Ant):
@@ -213,14 +258,14 @@ class ThrowerAnt(Ant):
 
         Problem B5: This method returns None if there is no Bee in range.
         """
-        place = self.place
-        distance = 0
+        ancestors = self.place._ancestors
+        if ancestors is None:
+            # This Place was not configured by an AntColony
+            ancestors = self.place.entrances_to(hive)
 
-        while place is not hive:
-            if self.min_range <= distance <= self.max_range and place.bees:
+        for place in ancestors[self.min_range:self.max_range + 1]:
+            if place.bees:
                 return random_or_none(place.bees)
-            place = place.entrance
-            distance += 1
 
     def throw_at(self, target):
         """Throw a leaf at the target Bee, reducing its armor."""
@@ -246,15 +291,28 @@ class Hive(Place):
         self.bees = []
         for bee in assault_plan.all_bees:
             self.add_insect(bee)
+        # The wave for each time step, so most turns index an empty tuple
+        last_wave = max(assault_plan, default=-1)
+        self._schedule = [assault_plan.get(t, ()) for t in range(last_wave + 1)]
         # The following attributes are always None for a Hive
         self.entrance = None
         self.ant = None
         self.exit = None
+        self._blocker = None
+        self._exits = None  # Set by AntColony.configure
 
     def strategy(self, colony):
-        exits = [p for p in colony.places.values() if p.entrance is self]
-        for bee in self.assault_plan.get(colony.time, []):
-            bee.move_to(random.choice(exits))
+        if colony.time >= len(self._schedule):
+            return
+        bees = self._schedule[colony.time]
+        if not bees:
+            return
+        exits = self._exits
+        if exits is None:
+            exits = [p for p in colony.places.values() if p.entrance is self]
+        # Choose an exit for every Bee in the wave at once
+        for bee, exit in zip(bees, random.choices(exits, k=len(bees))):
+            bee.move_to(exit)
 
 
 class AntColony:
@@ -280,31 +338,43 @@ class AntColony:
         self.food = food
         self.strategy = strategy
         self.hive = hive
-        self.ant_types = OrderedDict((a.name, a) for a in ant_types)
+        self.ant_types = {a.name: a for a in ant_types}
         self.configure(hive, create_places)
 
     def configure(self, hive, create_places):
         """Configure the places in the colony."""
         self.queen = Place('AntQueen')
-        self.places = OrderedDict()
+        self._queen_place_set = False  # Set once a QueenAnt takes the throne
+        self.places = {}
         self.bee_entrances = []
-        def register_place(place, is_bee_entrance):
-            self.places[place.name] = place
-            if is_bee_entrance:
-                place.entrance = hive
-                self.bee_entrances.append(place)
-        register_place(self.hive, False)
-        create_places(self.queen, register_place)
+        self._register_place(self.hive, False, hive)
+        create_places(self.queen, partial(self._register_place, hive=hive))
+        # Tunnels are fixed from here on, so ThrowerAnts can scan a list
+        for place in self.places.values():
+            place._ancestors = place.entrances_to(hive)
+            place._tunnel_places = place.tunnel(hive)
+        self._places_list = list(self.places.values())
+        hive._exits = list(self.bee_entrances)
+
+    def _register_place(self, place, is_bee_entrance, hive):
+        """Add a Place to the colony; bee entrances are connected to hive."""
+        self.places[place.name] = place
+        if is_bee_entrance:
+            place.entrance = hive
+            self.bee_entrances.append(place)
 
     def simulate(self):
         """Simulate an attack on the ant colony (i.e., play the game)."""
-        while len(self.queen.bees) == 0 and len(self.bees) > 0:
+        while len(self.queen.bees) == 0 and \
+                any(p.bees for p in self._places_list):
             self.hive.strategy(self)    # Bees invade
             self.strategy(self)         # Ants deploy
-            for ant in self.ants:       # Ants take actions
-                if ant.armor > 0:
+            for place in self._places_list:  # Ants take actions
+                ant = place.ant
+                if ant is not None and ant.armor > 0:
                     ant.action(self)
-            for bee in self.bees:       # Bees take actions
+            bees = self.bees            # Built once, after ants act
+            for bee in bees:            # Bees take actions
                 if bee.armor > 0:
                     bee.action(self)
             self.time += 1
@@ -345,16 +415,25 @@ class AntColony:
 
     def __str__(self):
         status = ' (Food: {0}, Time: {1})'.format(self.food, self.time)
-        return str([str(i) for i in self.ants + self.bees]) + status
+        return str([str(i) for i in self.insects]) + status
+
+_ANT_TYPES_CACHE = None  # Filled in by the first call to ant_types
 
 def ant_types():
-    """Return a list of all implemented Ant classes."""
-    all_ant_types = []
-    new_types = [Ant]
-    while new_types:
-        new_types = [t for c in new_types for t in c.__subclasses__()]
-        all_ant_types.extend(new_types)
-    return [t for t in all_ant_types if t.implemented]
+    """Return a list of all implemented Ant classes.
+
+    The class hierarchy does not change once this module is loaded, so the
+    result is computed once and copied on each call.
+    """
+    global _ANT_TYPES_CACHE
+    if _ANT_TYPES_CACHE is None:
+        all_ant_types = []
+        new_types = [Ant]
+        while new_types:
+            new_types = [t for c in new_types for t in c.__subclasses__()]
+            all_ant_types.extend(new_types)
+        _ANT_TYPES_CACHE = [t for t in all_ant_types if t.implemented]
+    return list(_ANT_TYPES_CACHE)
 
 def interactive_strategy(colony):
     """A strategy that starts an interactive session and lets the user make
@@ -440,10 +519,15 @@ class AssaultPlan(dict):
     def __init__(self, bee_armor=3):
         self.bee_armor = bee_armor
 
-    def add_wave(self, time, count):
+    def add_wave(self, time, count, _Bee=Bee):
         """Add a wave at time with count Bees that have the specified armor."""
-        bees = [Bee(self.bee_armor) for _ in range(count)]
-        self.setdefault(time, []).extend(bees)
+        armor = self.bee_armor
+        bees = [_Bee(armor) for _ in range(count)]
+        wave = self.get(time)
+        if wave is None:
+            self[time] = bees
+        else:
+            wave.extend(bees)
         return self
 
     @property
@@ -478,7 +562,6 @@ class Water(Place):
 
     def add_insect(self, insect):
         """Add insect if it is watersafe, otherwise reduce its armor to 0."""
-        print('added', insect, insect.watersafe)
         super().add_insect(insect)
 
         if not insect.watersafe:
@@ -500,11 +583,7 @@ class FireAnt(Ant):
         self.armor -= amount
 
         if self.armor <= 0:
-            bees = self.place.bees[:]
-
-            for bee in bees:
-                bee.reduce_armor(self.damage)
-
+            self.place.reduce_bees_armor(self.damage)
             self.place.remove_insect(self)
 
 
@@ -553,9 +632,7 @@ class NinjaAnt(Ant):
     blocks_path = False
 
     def action(self, colony):
-        bees = self.place.bees[:]
-        for bee in bees:
-            bee.reduce_armor(self.damage)
+        self.place.reduce_bees_armor(self.damage)
 
 
 class ScubaThrower(ThrowerAnt):
@@ -646,7 +723,7 @@ class QueenAnt(ScubaThrower):
         self.instance_num = QueenAnt.number_of_queens
 
         QueenAnt.number_of_queens += 1
-        self.doubled_ants = []
+        self.doubled_ants = set()
 
     def action(self, colony):
         """A queen ant throws a leaf, but also doubles the damage of ants
@@ -655,19 +732,18 @@ class QueenAnt(ScubaThrower):
             self.reduce_armor(self.armor)
             return
 
-        if not isinstance(colony.queen, QueenPlace):
-
+        if not colony._queen_place_set:
             colony.queen = QueenPlace(colony.queen, self.place)
+            colony._queen_place_set = True
 
-        current = self.place
-
-        while current.entrance is not None and current.entrance is not colony.hive:
-            current = current.entrance
+        tunnel = self.place._tunnel_places
+        if tunnel is None:
+            # This Place was not configured by an AntColony
+            tunnel = self.place.tunnel(colony.hive)
 
-        while current is not None:
-            if current.ant is not None:
-                self.double_damage(current.ant)
-            current = current.exit
+        for place in tunnel:
+            if place.ant is not None:
+                self.double_damage(place.ant)
 
         # should hrow a leaf like a normal ScubaThrower?
         super().action(colony)
@@ -677,11 +753,11 @@ class QueenAnt(ScubaThrower):
         if ant.container and ant.ant is not None:
             if ant.ant not in self.doubled_ants and ant.ant is not self:
                 ant.ant.damage *= 2
-                self.doubled_ants.append(ant.ant)
+                self.doubled_ants.add(ant.ant)
 
         if ant not in self.doubled_ants and ant is not self:
             ant.damage *= 2
-            self.doubled_ants.append(ant)
+            self.doubled_ants.add(ant)
 
 class AntRemover(Ant):
     """Allows the player to remove ants from the board in the GUI."""
@@ -1,6 +1,7 @@
 """The Game of Hog."""
 # Daniel Daum, CIS 61A
 
+import random
 from dice import four_sided, six_sided, make_test_dice
 from ucb import main, trace, log_current_line, interact
 
@@ -24,21 +25,28 @@ def roll_dice(num_rolls, dice=six_sided):
     assert num_rolls > 0, 'Must roll at least once.'
 
     total = 0
-    rolls = []
+    pig = False
 
     for roll in range(num_rolls):
         result = dice()
-        rolls.append(result)
         total += result
+        if result == 1:
+            pig = True
 
     # Hog out
-    for i in range(len(rolls)):
-        if rolls[i] == 1:
-            total = 1
+    return 1 if pig else total
 
 
-    return total
+def free_bacon(opponent_score):
+    """Return the points scored by rolling 0 dice (Free bacon): one more
+    than the largest digit of OPPONENT_SCORE.
 
+    >>> free_bacon(7)
+    8
+    >>> free_bacon(34)
+    5
+    """
+    return max(opponent_score // 10, opponent_score % 10) + 1
 
 
 def take_turn(num_rolls, opponent_score, dice=six_sided):
@@ -55,11 +63,7 @@ def take_turn(num_rolls, opponent_score, dice=six_sided):
 
     # Free bacon
     if num_rolls == 0:
-        if opponent_score < 10:
-            return opponent_score + 1
-        else:
-            return max(int(str(opponent_score)[0]), int(str(opponent_score)[1])) + 1
-
+        return free_bacon(opponent_score)
 
     return roll_dice(num_rolls, dice)
 
@@ -76,13 +80,7 @@ def select_dice(score, opponent_score):
     >>> select_dice(0, 0) == four_sided
     True
     """
-
-    combined_score = score + opponent_score
-
-    if combined_score % 7 == 0:
-        return four_sided
-    else:
-        return six_sided
+    return four_sided if (score + opponent_score) % 7 == 0 else six_sided
 
 
 def other(who):
@@ -107,39 +105,24 @@ def play(strategy0, strategy1, goal=GOAL_SCORE):
     strategy1:  The strategy function for Player 1, who plays second.
     """
     who = 0  # Which player is about to take a turn, 0 (first) or 1 (second)
-    score, opponent_score = 0, 0
-    temp = 0
-
-    while True:
-
-        # Player 0 turn
-        player_0_strategy = strategy0(score, opponent_score)
-        player_0_dice = select_dice(score, opponent_score)
-        score += take_turn(player_0_strategy, opponent_score, player_0_dice)
-
-        if score * 2 == opponent_score:
-            temp = score
-            score = opponent_score
-            opponent_score = temp
-
-        if score >= goal:
-            break
+    scores = [0, 0]
+    strategies = (strategy0, strategy1)
 
+    while max(scores) < goal:
+        opponent = other(who)
+        score, opponent_score = scores[who], scores[opponent]
+        num_rolls = strategies[who](score, opponent_score)
+        dice = select_dice(score, opponent_score)
+        scores[who] += take_turn(num_rolls, opponent_score, dice)
 
-        # player 1 turn
-        player_1_strategy = strategy1(opponent_score, score)
-        player_1_dice = select_dice(opponent_score, score)
-        opponent_score += take_turn(player_1_strategy, score, player_1_dice)
+        # Swine swap
+        if scores[who] * 2 == scores[opponent]:
+            scores[who], scores[opponent] = scores[opponent], scores[who]
 
-        if opponent_score * 2 == score:
-            temp = score
-            score = opponent_score
-            opponent_score = temp
+        who = opponent
 
-        if opponent_score >= goal:
-            break
+    return tuple(scores)
 
-    return (score, opponent_score)
 
 
 
@@ -155,6 +138,15 @@ def play(strategy0, strategy1, goal=GOAL_SCORE):
 BASELINE_NUM_ROLLS = 5
 BACON_MARGIN = 8
 
+def make_always_roll(n):
+    """Return a new strategy that rolls N dice whatever the scores."""
+    def strategy(score, opponent_score):
+        return n
+    return strategy
+
+# Every legal always_roll strategy, built once and shared
+ALWAYS_ROLL_STRATEGIES = tuple(make_always_roll(n) for n in range(11))
+
 def always_roll(n):
     """Return a strategy that always rolls N dice.
 
@@ -168,9 +160,9 @@ def always_roll(n):
     >>> strategy(99, 99)
     5
     """
-    def strategy(score, opponent_score):
-        return n
-    return strategy
+    if type(n) == int and 0 <= n < len(ALWAYS_ROLL_STRATEGIES):
+        return ALWAYS_ROLL_STRATEGIES[n]
+    return make_always_roll(n)
 
 # Experiments
 
@@ -204,10 +196,28 @@ def make_averaged(fn, num_samples=1000):
     return hof
 
 
+def expected_turn_score(num_rolls, faces):
+    """Return the expected score of rolling NUM_ROLLS fair dice with FACES
+    sides. Without a 1, each roll averages (FACES + 2) / 2; otherwise the
+    turn scores 1 (Pig out).
+
+    >>> expected_turn_score(1, 6)
+    3.5
+    >>> expected_turn_score(2, 4)
+    3.8125
+    """
+    no_pig = ((faces - 1) / faces) ** num_rolls
+    return no_pig * num_rolls * (faces + 2) / 2 + (1 - no_pig)
+
+
+# Faces of the fair dice, whose average turn scores can be computed exactly
+FAIR_DICE_FACES = {four_sided: 4, six_sided: 6}
+
 def max_scoring_num_rolls(dice=six_sided):
     """Return the number of dice (1 to 10) that gives the highest average turn
     score by calling roll_dice with the provided DICE.  Print all averages as in
     the doctest below.  Assume that dice always returns positive outcomes.
+    The fair dice need no sampling: their exact expected scores are used.
 
     >>> dice = make_test_dice(3)
     >>> max_scoring_num_rolls(dice)
@@ -224,14 +234,17 @@ def max_scoring_num_rolls(dice=six_sided):
     10
     """
 
-
     averaged_roll =  make_averaged(roll_dice)
 
     max_score = 0
-    best_roll = 1
+    best_rolls = 1
 
     for num_rolls in range(1, 11):
-        average_score = averaged_roll(num_rolls, dice)
+        if dice in FAIR_DICE_FACES:
+            average_score = expected_turn_score(num_rolls,
+                                                FAIR_DICE_FACES[dice])
+        else:
+            average_score = averaged_roll(num_rolls, dice)
 
         print(f'{num_rolls} dice scores {average_score} on average')
 
@@ -246,19 +259,23 @@ def max_scoring_num_rolls(dice=six_sided):
 def winner(strategy0, strategy1):
     """Return 0 if strategy0 wins against strategy1, and 1 otherwise."""
     score0, score1 = play(strategy0, strategy1)
-    if score0 > score1:
-        return 0
-    else:
-        return 1
+    return int(score0 <= score1)
+
+averaged_winner = make_averaged(winner)
 
 def average_win_rate(strategy, baseline=always_roll(BASELINE_NUM_ROLLS)):
     """Return the average win rate (0 to 1) of STRATEGY against BASELINE."""
-    win_rate_as_player_0 = 1 - make_averaged(winner)(strategy, baseline)
-    win_rate_as_player_1 = make_averaged(winner)(baseline, strategy)
+    win_rate_as_player_0 = 1 - averaged_winner(strategy, baseline)
+    win_rate_as_player_1 = averaged_winner(baseline, strategy)
     return (win_rate_as_player_0 + win_rate_as_player_1) / 2 # Average results
 
-def run_experiments():
-    """Run a series of strategy experiments and report results."""
+def run_experiments(seed=0):
+    """Run a series of strategy experiments and report results.
+
+    The dice share the random module's generator, which is seeded with SEED
+    so that results repeat.
+    """
+    random.seed(seed)
     if True: # Change to False when done finding max_scoring_num_rolls
         six_sided_max = max_scoring_num_rolls(six_sided)
         print('Max scoring num rolls for six-sided dice:', six_sided_max)
@@ -292,19 +309,13 @@ def bacon_strategy(score, opponent_score):
     >>> bacon_strategy(50, 70)
     0
     """
-    if opponent_score < 10:
-            bacon_points = opponent_score + 1
-    else:
-        bacon_points = max(int(str(opponent_score)[0]), int(str(opponent_score)[1])) + 1
+    bacon_points = free_bacon(opponent_score)
 
     if bacon_points >= BACON_MARGIN:
         return 0
     else:
         return BASELINE_NUM_ROLLS
 
-
-    return 5 # Replace this statement
-
 def swap_strategy(score, opponent_score):
     """This strategy rolls 0 dice when it would result in a beneficial swap and
     rolls BASELINE_NUM_ROLLS if it would result in a harmful swap. It also rolls
@@ -320,10 +331,7 @@ def swap_strategy(score, opponent_score):
     >>> swap_strategy(12, 12) # Baseline
     5
     """
-    if opponent_score < 10:
-        bacon_points = opponent_score + 1
-    else:
-        bacon_points = max(int(str(opponent_score)[0]), int(str(opponent_score)[1])) + 1
+    bacon_points = free_bacon(opponent_score)
 
     new_score = score + bacon_points
 
@@ -339,16 +347,22 @@ def swap_strategy(score, opponent_score):
     else:
         return BASELINE_NUM_ROLLS
 
+# Dice to roll in final_strategy once swaps are ruled out, indexed by
+# (using four-sided dice) << 2 | (score >= 90) << 1 | (behind by over 20)
+FINAL_STRATEGY_ROLLS = (
+    5, 8,  # Six-sided dice: baseline, catching up
+    3, 3,  # Six-sided dice: end game
+    5, 6,  # Four-sided dice: baseline, catching up
+    2, 2,  # Four-sided dice: end game
+)
+
 def final_strategy(score, opponent_score):
     """Write a brief description of your final strategy.
 
     *** YOUR DESCRIPTION HERE ***
     """
 
-    if opponent_score < 10:
-        bacon_points = opponent_score + 1
-    else:
-        bacon_points = max(int(str(opponent_score)[0]), int(str(opponent_score)[1])) + 1
+    bacon_points = free_bacon(opponent_score)
 
     # Calculate new score if we roll 0
     new_score = score + bacon_points
@@ -356,12 +370,6 @@ def final_strategy(score, opponent_score):
     # Check if we'll be using four-sided dice
     using_four_sided = (score + opponent_score) % 7 == 0
 
-    # Will opponent use four-sided dice after our turn?
-    def will_opponent_use_four_sided(our_score, their_score):
-        return (our_score + their_score) % 7 == 0
-
-    point_difference = score - opponent_score
-
     # 1. Check for beneficial swap opportunity
     if new_score * 2 == opponent_score:
         return 0
@@ -372,19 +380,11 @@ def final_strategy(score, opponent_score):
             return 3  # Roll fewer dice with four-sided
         return BASELINE_NUM_ROLLS
 
-    # 3. End game strategy (when close to winning)
-    if score >= 90:
-        # Play very conservatively when close to winning
-        if using_four_sided:
-            return 2
-        return 3
-
-    # 4. Catching up strategy (when significantly behind)
-    if point_difference < -20:
-        # Take more risks to catch up
-        if using_four_sided:
-            return 6
-        return 8
+    # 3. End game strategy: play conservatively when close to winning
+    # 4. Catching up strategy: take more risks when far behind
+    phase = (using_four_sided << 2) | ((score >= 90) << 1) | \
+            (score - opponent_score < -20)
+    return FINAL_STRATEGY_ROLLS[phase]
 
 
 